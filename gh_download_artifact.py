@@ -5,23 +5,157 @@
 #   -H "Authorization: Bearer <YOUR-TOKEN>" \
 #   -H "X-GitHub-Api-Version: 2022-11-28" \
 #   https://api.github.com/repos/OWNER/REPO/actions/artifacts
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import json
+import math
+import os
 from pathlib import Path
+import shutil
+import threading
+import time
 import zipfile
+import zlib
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CHUNK_SIZE = 1 << 20  # 1 MiB
+
+
+def file_crc32(path):
+    """
+    Computes the CRC32 of a file on disk, in the same way zip archives store it for their members.
+    """
+    crc = 0
+    with open(path, 'rb') as f:
+        while chunk := f.read(CHUNK_SIZE):
+            crc = zlib.crc32(chunk, crc)
+
+    return crc
+
+
+class RateLimitError(Exception):
+    def __init__(self, reset_at, message=None):
+        """
+        reset_at: Epoch time (in seconds) at which the rate limit is expected to reset.
+        """
+        self.reset_at = reset_at
+        if message is None:
+            message = f'GitHub API rate limit exceeded, resets at {time.ctime(reset_at)}.'
+        super().__init__(message)
 
 
 class Repository:
-    def __init__(self, token, owner, repo):
+    def __init__(self, token, owner, repo, cache_dir='./.gh_cache', max_retries=5, ratelimit_threshold=5, max_wait=300):
         """
         token: GitHub Personal Access Token
         owner: GitHub repository owner
         repo: GitHub repository name
+        cache_dir: Directory where API responses are cached along with their ETag. Set to None to disable caching.
+        max_retries: Number of times a rate limited or 5xx request is retried, with exponential backoff.
+        ratelimit_threshold: When X-RateLimit-Remaining falls below this value, wait for the reset before continuing.
+        max_wait: Longest time (in seconds) to sleep for a rate limit. Beyond this, RateLimitError is raised instead.
         """
         self.token = token
         self.owner = owner
         self.repo = repo
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.max_retries = max_retries
+        self.ratelimit_threshold = ratelimit_threshold
+        self.max_wait = max_wait
+
+        # A single pooled session lets consecutive API calls reuse the same TLS connection
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=20))
+        self._session.headers.update({
+            'Accept': 'application/vnd.github+json',
+            'Authorization': f'Bearer {self.token}',
+            'X-GitHub-Api-Version': '2022-11-28'
+        })
     
+    def _request(self, method, url, **kwargs):
+        """
+        Sends a request through the session while respecting GitHub's rate limits: 403/429 responses
+        caused by rate limiting and 5xx errors are retried with exponential backoff, and we pause until
+        X-RateLimit-Reset when the remaining quota drops below `ratelimit_threshold`.
+        """
+        for attempt in range(self.max_retries + 1):
+            res = self._session.request(method, url, **kwargs)
+
+            remaining = res.headers.get('X-RateLimit-Remaining')
+            reset_at = int(res.headers.get('X-RateLimit-Reset', time.time()))
+            is_last_attempt = attempt == self.max_retries
+
+            rate_limited = res.status_code == 429 or (
+                res.status_code == 403 and (remaining == '0' or 'Retry-After' in res.headers)
+            )
+            if rate_limited:
+                res.close()
+                if 'Retry-After' in res.headers:
+                    wait = int(res.headers['Retry-After'])
+                elif remaining == '0':
+                    wait = reset_at - time.time() + 1
+                else:
+                    wait = 60
+                wait = max(wait, 2 ** attempt)
+
+                if is_last_attempt or wait > self.max_wait:
+                    raise RateLimitError(reset_at=time.time() + wait)
+                print(f'Rate limited by GitHub API. Retrying in {wait:.0f}s.')
+                time.sleep(wait)
+                continue
+
+            if res.status_code >= 500 and not is_last_attempt:
+                res.close()
+                wait = 2 ** attempt
+                print(f'GitHub API returned {res.status_code}. Retrying in {wait}s.')
+                time.sleep(wait)
+                continue
+
+            if remaining is not None and int(remaining) < self.ratelimit_threshold:
+                wait = reset_at - time.time() + 1
+                if 0 < wait <= self.max_wait:
+                    print(f'Only {remaining} GitHub API requests remaining. Waiting {wait:.0f}s for the reset.')
+                    time.sleep(wait)
+
+            return res
+
+    def _cached_get(self, url, params=None):
+        """
+        GETs a JSON API endpoint with If-None-Match. A 304 response does not count against the
+        primary rate limit and has no body, in which case the cached body is returned instead.
+        """
+        if self.cache_dir is None:
+            res = self._request('GET', url, params=params)
+            res.raise_for_status()
+            return res.json()
+
+        full_url = requests.Request('GET', url, params=params).prepare().url
+        cache_path = self.cache_dir / f'{hashlib.sha1(full_url.encode()).hexdigest()}.json'
+
+        cached = None
+        headers = {}
+        if cache_path.exists():
+            with open(cache_path, 'r') as f:
+                cached = json.load(f)
+            headers['If-None-Match'] = cached['etag']
+
+        res = self._request('GET', full_url, headers=headers)
+        if res.status_code == 304 and cached is not None:
+            return cached['body']
+
+        res.raise_for_status()
+        body = res.json()
+
+        etag = res.headers.get('ETag')
+        if etag is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(cache_path, 'w') as f:
+                json.dump({'etag': etag, 'body': body}, f)
+
+        return body
+
     def list_artifacts(self, per_page=30, page=1, name=None):
         """
         per_page: The number of results per page (max 100).
@@ -33,21 +167,36 @@ class Repository:
         if per_page < 1:
             raise ValueError('per_page must be greater than 0.')
         
-        headers = {
-            'Accept': 'application/vnd.github+json',
-            'Authorization': f'Bearer {self.token}',
-            'X-GitHub-Api-Version': '2022-11-28'
-        }
-
-        url = f'https://api.github.com/repos/{self.owner}/{self.repo}/actions/artifacts?per_page={per_page}&page={page}'
+        url = f'https://api.github.com/repos/{self.owner}/{self.repo}/actions/artifacts'
+        params = {'per_page': per_page, 'page': page}
         if name:
-            url += f'&name={name}'
-        
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req) as res:
-            body = json.loads(res.read())
-        
-        return body
+            params['name'] = name
+
+        return self._cached_get(url, params=params)
+
+    def list_all_artifacts(self, per_page=100, name=None, max_workers=8):
+        """
+        Lists the artifacts across all pages. The first page tells us `total_count`, the
+        remaining pages are then fetched concurrently over the pooled session.
+
+        per_page: The number of results per page (max 100).
+        name: Filters artifacts by exact match on their name field.
+        max_workers: Maximum number of pages fetched at the same time.
+        """
+        first = self.list_artifacts(per_page=per_page, page=1, name=name)
+        n_pages = math.ceil(first['total_count'] / per_page)
+
+        artifacts = list(first['artifacts'])
+        if n_pages > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                pages = executor.map(
+                    lambda page: self.list_artifacts(per_page=per_page, page=page, name=name),
+                    range(2, n_pages + 1),
+                )
+                for body in pages:
+                    artifacts.extend(body['artifacts'])
+
+        return artifacts
 
     def get_artifacts(self, artifact_id):
         """
@@ -55,19 +204,9 @@ class Repository:
         can use this endpoint. If the repository is private you must use an access token with 
         the repo scope. GitHub Apps must have the actions:read permission to use this endpoint.
         """
-        headers = {
-            'Accept': 'application/vnd.github+json',
-            'Authorization': f'Bearer {self.token}',
-            'X-GitHub-Api-Version': '2022-11-28'
-        }
-
         url = f'https://api.github.com/repos/{self.owner}/{self.repo}/actions/artifacts/{artifact_id}'
         
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req) as res:
-            body = json.loads(res.read())
-        
-        return body
+        return self._cached_get(url)
 
     def download_artifact(self, artifact_id, archive_format='zip', save_dir='./gh_artifacts', save_name=None, overwrite=False):
         """
@@ -81,82 +220,128 @@ class Repository:
         save_name: Name of the file to save the artifact to. By default, the artifact ID and archive format are used.
         overwrite: Whether to overwrite the file if it already exists. If overwrite=False, will stop and give a warning. Default: False
         """
-        headers = {
-            'Accept': 'application/vnd.github+json',
-            'Authorization': f'Bearer {self.token}',
-            'X-GitHub-Api-Version': '2022-11-28'
-        }
-
         url = f'https://api.github.com/repos/{self.owner}/{self.repo}/actions/artifacts/{artifact_id}/{archive_format}'
         
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req) as res:
-            body = res.read()  # body is a bytes object, we need to write it to a file
-
         if save_name is None:
             save_name = f'{artifact_id}.{archive_format}'
         save_dir = Path(save_dir)
         save_dir.mkdir(parents=True, exist_ok=True)
         save_path = save_dir / save_name
         
-        if save_path.exists():
-            if overwrite:
-                save_path.unlink()
-            else:
-                print(f'File {save_path} already exists. Skipping download.')
-                return save_path
-
-        with open(save_path, 'wb') as f:
-            f.write(body)
+        if save_path.exists() and not overwrite:
+            print(f'File {save_path} already exists. Skipping download.')
+            return save_path
+
+        # Stream the response straight to disk so the archive is never held in memory. It goes to
+        # a temporary file first, so a failed download never replaces an existing archive.
+        part_path = save_path.with_name(save_path.name + '.part')
+        try:
+            with self._request('GET', url, stream=True) as res:
+                res.raise_for_status()
+                with open(part_path, 'wb') as f:
+                    f.writelines(res.iter_content(chunk_size=CHUNK_SIZE))
+            os.replace(part_path, save_path)
+        finally:
+            part_path.unlink(missing_ok=True)
         
         return save_path
 
-    def extract_artifact(self, path, save_dir='./gh_artifacts', use_name_as_subdir=True, overwrite=False):
+    def download_many(self, artifact_ids, max_workers=4, **kwargs):
+        """
+        Downloads several artifacts concurrently. Returns the saved paths in the same order as `artifact_ids`.
+
+        artifact_ids: The artifact IDs to download.
+        max_workers: Maximum number of downloads running at the same time.
+        kwargs: Passed to download_artifact (save_dir, overwrite, etc.). save_name is not supported.
+        """
+        if 'save_name' in kwargs:
+            raise ValueError('save_name is not supported when downloading multiple artifacts.')
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            paths = executor.map(lambda artifact_id: self.download_artifact(artifact_id, **kwargs), artifact_ids)
+            return list(paths)
+
+    def extract_artifact(self, path, save_dir='./gh_artifacts', use_name_as_subdir=True, overwrite=False, max_workers=None):
         """
         Extracts the contents of a zip file and save to a directory.
 
         path: Path to the zip file.
         save_dir: Directory to save the contents of the zip file to (or that will contain the subdir of use_name_as_subdir=True)
         use_name_as_subdir: Whether to use the name of the zip file as the name of the subdirectory to save the contents to. Default: True
+        max_workers: Number of threads decompressing members concurrently. Default: os.cpu_count()
         """
         path = Path(path)
         if path.suffix != '.zip':
             raise ValueError('Only zip files are supported.')
 
+        save_dir = Path(save_dir)
         if use_name_as_subdir:
             save_dir = save_dir / path.stem
-        
-        save_dir = Path(save_dir)
+
         save_dir.mkdir(parents=True, exist_ok=True)
+        if max_workers is None:
+            max_workers = os.cpu_count()
 
+        # Resolve targets and handle overwrites up front, so the workers only decompress. Plain
+        # os.path string operations are used here since this runs once per member.
+        base = str(save_dir)
+        created_dirs = set()
+        members = []
         with zipfile.ZipFile(path, 'r') as zip_ref:
-            for member in zip_ref.namelist():
-                filename = Path(member)
+            for info in zip_ref.infolist():
+                name = info.filename
+                if name.endswith('/'):
+                    continue
 
-                if filename.is_dir():
+                # Same sanitization as ZipFile.extract: never write outside of save_dir
+                if os.path.isabs(name) or '..' in name.split('/'):
+                    print(f'Unsafe path {name} in archive. Skipping extraction.')
                     continue
-                
-                if use_name_as_subdir:
-                    filename = save_dir / filename
-                else:
-                    filename = save_dir / path.stem / filename
-                
-                if filename.exists():
+
+                filename = os.path.join(base, name)
+                if os.path.exists(filename):
+                    # An identical file is already there (e.g. re-running the same job), skip re-inflating it
+                    if os.path.getsize(filename) == info.file_size and file_crc32(filename) == info.CRC:
+                        continue
+
                     if overwrite:
-                        filename.unlink()
+                        os.remove(filename)
                     else:
                         print(f'File {filename} already exists. Skipping extraction.')
                         continue
-                
-                filename.parent.mkdir(parents=True, exist_ok=True)
-                zip_ref.extract(member, save_dir)
+
+                parent = os.path.dirname(filename)
+                if parent not in created_dirs:
+                    os.makedirs(parent, exist_ok=True)
+                    created_dirs.add(parent)
+                members.append((info, filename))
+
+        # ZipFile is not safe to read from several threads at once, so each worker opens its own handle
+        local = threading.local()
+        handles = []
+
+        def extract_member(member):
+            info, filename = member
+            if not hasattr(local, 'zip_ref'):
+                local.zip_ref = zipfile.ZipFile(path, 'r')
+                handles.append(local.zip_ref)
+
+            # Decompress in fixed-size chunks instead of buffering the whole member
+            with local.zip_ref.open(info) as src, open(filename, 'wb') as dst:
+                shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(extract_member, members))
+        finally:
+            for zip_ref in handles:
+                zip_ref.close()
         
         return save_dir
 
 
 if __name__ == '__main__':
     import argparse
-    import os
     
     parser = argparse.ArgumentParser(description='Download the latest artifact from a GitHub repository.')
     parser.add_argument('--token', type=str, help='GitHub Personal Access Token', required=True)
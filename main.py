@@ -7,48 +7,196 @@ environment variable that holds this value), maybe using the github actions work
 some other method.
 """
 import os
+import asyncio
+import atexit
 import datetime as dt
-import time
+import functools
 import html
 import json
+import re
+import threading
+import time
+import traceback
+from collections import OrderedDict, namedtuple
+from html.parser import HTMLParser
 from urllib.parse import urlparse
+from xml.etree import ElementTree
 
+import requests
 import tldextract
-from bs4 import BeautifulSoup
-import feedparser
-from pythorhead import Lemmy
 
+# Reddit throttles generic user agents much more aggressively, and asks for the format
+# <platform>:<app ID>:<version string> (by <contact>)
+USER_AGENT = "python:reddit-sales-repost-bot:v1 (by https://github.com/poutinetown)"
 
-def format_and_extract(summary):
-    soup = BeautifulSoup(summary, features="html.parser")
-    links = soup.find_all("a")
+# Use the public suffix list snapshot bundled with tldextract, so that looking up a domain
+# never triggers a network fetch of the list. A single extractor is reused for every lookup.
+_TLD_EXTRACT = tldextract.TLDExtract(suffix_list_urls=())
+
+# Anchors whose content is plain text, which is the case for every link Reddit puts in a summary.
+# The text's surrounding whitespace is left out of the group, so it does not need stripping.
+_TEXT_LINK_RE = re.compile(r'<a href="([^"]+)">\s*([^<]*?)\s*</a>')
+# Labels of the links Reddit adds to every summary, the "[link]" one is also the shared URL
+_LINK_LABELS = {
+    "[link]": "Link Shared on Reddit",
+    "[comments]": "Original Reddit Comments",
+}
+# Reddit post URLs look like /r/<subreddit>/comments/<base36 id>/<slug>/
+_POST_ID_RE = re.compile(r'/comments/([0-9a-z]+)')
+
+_ATOM_NS = {"atom": "http://www.w3.org/2005/Atom"}
+
+# The fields of a feed entry that are used here, `published` is a UTC epoch
+FeedEntry = namedtuple("FeedEntry", ["id", "title", "link", "published", "summary"])
+
+# Maximum number of handled entry ids to remember, the feed only holds the ~25 newest entries
+SEEN_IDS_LIMIT = 500
 
-    extracted_url = None
-    formatted = ""
 
-    for link in links:
-        first_child = next(link.children).strip()
-        url = link.get("href")
+def fast_unescape(s):
+    # Almost no title or link has an HTML entity, skip html.unescape's regex scan for those
+    return s if "&" not in s else html.unescape(s)
 
-        if first_child == "[link]":
-            extracted_url = url
-            text = "Link Shared on Reddit"
-        elif first_child == "[comments]":
-            text = "Original Reddit Comments"
+
+def extract_shared_url(summary):
+    """
+    Find the "[link]" URL of a summary, without formatting the whole body like
+    format_and_extract does. Returns None if there is no such link. The links are read with
+    iter_links, so this is always the URL that format_and_extract would post.
+    """
+    for text, url in iter_links(summary):
+        if text == "[link]":
+            return url
+
+    return None
+
+
+class LinkExtractor(HTMLParser):
+    """
+    Collect the (text, url) pair of every <a> tag in a single linear scan, without building a
+    tree. The text is all the text inside the tag, including nested tags like
+    <a><span>[link]</span></a>, and tags without any text (e.g. thumbnails) are left out.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.links = []
+        self._href = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            self._href = dict(attrs).get("href")
+            self._text = []
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self._href is not None:
+            text = "".join(self._text).strip()
+            if text:
+                self.links.append((text, self._href))
+            self._href = None
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+
+def iter_links(summary):
+    """
+    Yield the (text, url) pair of every link in the summary. A single precompiled regex scan
+    handles the markup Reddit generates; LinkExtractor is only used as a fallback for the
+    summaries where the regex did not match every link, e.g. if the markup ever changes.
+    """
+    matches = [(url, text) for url, text in _TEXT_LINK_RE.findall(summary) if text]
+    # Any anchor the regex missed (nested tags, other attributes, thumbnails) or that was empty
+    # makes the whole summary go through the parser, so that no link is silently dropped
+    if len(matches) == summary.count("<a "):
+        # Decode the text like HTMLParser does in the fallback, so that both paths yield the same
+        # text to format_and_extract
+        for url, text in matches:
+            yield fast_unescape(text), fast_unescape(url)
+        return
+
+    parser = LinkExtractor()
+    parser.feed(summary)
+    parser.close()
+    yield from parser.links
+
+
+def format_and_extract(summary):
+    extracted_url = None
+    parts = []
+
+    for first_child, url in iter_links(summary):
+        if (text := _LINK_LABELS.get(first_child)) is not None:
+            if first_child == "[link]":
+                extracted_url = url
         elif first_child.startswith("/u/"):
             text = f"Author: {first_child}"
         else:
-            if first_child.startswith("["):
-                first_child = first_child[1:]
-            if first_child.endswith("]"):
-                first_child = first_child[:-1]
-            text = html.unescape(first_child)
+            text = fast_unescape(first_child.strip("[]"))
 
-        formatted += f"- [{text}]({url})\n"
+        parts.append(f"- [{text}]({url})\n")
 
+    formatted = "".join(parts)
     return formatted, extracted_url
 
 
+def make_session():
+    """
+    Create the HTTP session used by the feed polls, so that the connection to Reddit (and its
+    TLS handshake) is reused for the whole run.
+    """
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def fetch_feed(session, url, etag=None, modified=None):
+    """
+    Download the raw feed at `url` with a conditional GET. Returns the (content, etag, modified)
+    of the response, or None if the feed was not modified since `etag`/`modified`. The session
+    asks for a gzip response and decompresses it.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if modified:
+        headers["If-Modified-Since"] = modified
+
+    res = session.get(url, headers=headers, timeout=30)
+    if res.status_code == 304:
+        return None
+    res.raise_for_status()
+
+    return res.content, res.headers.get("ETag"), res.headers.get("Last-Modified")
+
+
+def parse_feed(content):
+    """
+    Parse the Atom feed content that was already downloaded by fetch_feed into a list of
+    FeedEntry. Reddit's feed always has the same shape, so only the few fields used here are
+    read with ElementTree, instead of going through a generic feed parser.
+    """
+    root = ElementTree.fromstring(content)
+
+    entries = []
+    for element in root.iterfind("atom:entry", _ATOM_NS):
+        published = element.findtext("atom:published", namespaces=_ATOM_NS)
+        entries.append(
+            FeedEntry(
+                id=element.findtext("atom:id", namespaces=_ATOM_NS),
+                title=element.findtext("atom:title", "", _ATOM_NS),
+                link=element.find("atom:link", _ATOM_NS).get("href"),
+                # Atom dates are RFC 3339, e.g. 2023-07-01T12:34:56+00:00
+                published=dt.datetime.fromisoformat(published).timestamp(),
+                summary=element.findtext("atom:content", "", _ATOM_NS),
+            )
+        )
+
+    return entries
+
+
 def get_last_published_time(
     path="last_date_published.txt", offset=dt.timedelta(minutes=10, seconds=45)
 ):
@@ -62,22 +210,79 @@ def get_last_published_time(
         last_published = dt_now - offset
     return last_published
 
-def load_published_urls_dict(path="published_urls.json"):
+def load_seen_ids(path="seen_ids.json"):
+    """
+    Load the ids of the feed entries that were already handled (published or deliberately
+    skipped), least recently seen first. They are kept in an OrderedDict used as an LRU set.
+    """
+    if not os.path.exists(path):
+        migrate_published_urls(path)
+
+    try:
+        with open(path, "r") as f:
+            ids = json.load(f)
+    except FileNotFoundError:
+        ids = []
+
+    return OrderedDict.fromkeys(ids)
+
+def save_seen_ids(seen_ids, path="seen_ids.json"):
+    write_atomic(path, json.dumps(list(seen_ids)))
+
+def mark_seen(seen_ids, entry_id):
+    # Refresh the id if it was already there, so that only ids gone from the feed get evicted
+    seen_ids[entry_id] = None
+    seen_ids.move_to_end(entry_id)
+    while len(seen_ids) > SEEN_IDS_LIMIT:
+        seen_ids.popitem(last=False)
+
+def migrate_published_urls(path, json_path="published_urls.json"):
+    # Published posts used to be tracked by their reddit URL, in a JSON dict. The entry id is the
+    # post's base36 id found in the URL, convert them once so that nothing gets published twice
+    # after the switch.
+    try:
+        with open(json_path, "r") as f:
+            urls = list(json.load(f))
+    except FileNotFoundError:
+        return
+
+    seen_ids = OrderedDict()
+    for url in urls:
+        if match := _POST_ID_RE.search(url):
+            mark_seen(seen_ids, f"t3_{match.group(1)}")
+
+    save_seen_ids(seen_ids, path)
+
+def load_feed_cache(path="feed_cache.json"):
+    """
+    Load the ETag and Last-Modified validators of the previous successful feed fetch.
+    """
     try:
         with open(path, "r") as f:
-            published_urls_dict = json.load(f)
+            feed_cache = json.load(f)
     except FileNotFoundError:
-        published_urls_dict = {}
+        feed_cache = {}
 
-    return published_urls_dict
+    return feed_cache
 
-def save_published_urls_dict(published_urls_dict, path="published_urls.json"):
-    with open(path, "w") as f:
-        json.dump(published_urls_dict, f, indent=2)
+def save_feed_cache(etag, modified, path="feed_cache.json"):
+    feed_cache = {"etag": etag, "modified": modified}
+    write_atomic(path, json.dumps(feed_cache, indent=2))
 
 def write_last_published_time(dt_now, path="last_date_published.txt"):
-    with open(path, "w") as f:
-        f.write(dt_now.isoformat())
+    write_atomic(path, dt_now.isoformat())
+
+def write_atomic(path, content):
+    """
+    Write `content` to a temporary file and swap it in with os.replace, so that `path`
+    either holds the previous state or the new one, never a partially written file.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
 
 
 def load_ignored_domains(path="ignored.txt", as_set=True):
@@ -91,55 +296,250 @@ def load_ignored_domains(path="ignored.txt", as_set=True):
 
 def find_base_domain(extracted_url):
     try:
-        url_parsed = tldextract.extract(extracted_url)
+        url_parsed = _TLD_EXTRACT(extracted_url)
         base_domain = f"{url_parsed.domain}.{url_parsed.suffix}"
     except:
         base_domain = -1
     
     return base_domain
 
-def remove_old_url_keys(url_dict, limit_hours=24):
+def load_community_ids(path="community_id.json"):
+    try:
+        with open(path, "r") as f:
+            community_ids = json.load(f)
+    except FileNotFoundError:
+        community_ids = {}
+
+    return community_ids
+
+def save_community_ids(community_ids, path="community_id.json"):
+    write_atomic(path, json.dumps(community_ids, indent=2))
+
+def pool_pythorhead_connections():
     """
-    Remove entries that are older than `limit_hours` hours
+    pythorhead sends its API calls through the module-level requests.get/put/post, which open a
+    new connection every time. Point them to a session per thread instead, so that connections
+    are reused: posts run from several worker threads at once, and requests.Session is not
+    documented as thread-safe.
     """
+    from pythorhead.requestor import REQUEST_MAP
 
-    new_entries = {}
+    local = threading.local()
 
-    dt_now = dt.datetime.now(dt.timezone.utc)
+    def call(name, *args, **kwargs):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return getattr(local.session, name)(*args, **kwargs)
 
-    for url, entry in url_dict.items():
-        entry_published = dt.datetime.fromisoformat(entry["published_time"])
-        time_diff = dt_now - entry_published
+    for method in REQUEST_MAP:
+        REQUEST_MAP[method] = functools.partial(call, method.value.lower())
 
-        if time_diff < dt.timedelta(hours=limit_hours):
-            new_entries[url] = entry
+def connect_lemmy(instance_url, username, password, community_name):
+    # Imported here since pythorhead is slow to import, and is not needed at all when there
+    # is nothing new to publish
+    from pythorhead import Lemmy
 
-    return new_entries
+    # Note: this replaces pythorhead's module-global REQUEST_MAP, so every Lemmy client in the
+    # process (not only this one) sends its API calls through the thread-local sessions
+    pool_pythorhead_connections()
+    lemmy = Lemmy(instance_url)
+    # pythorhead logs failures and returns False/None instead of raising, raise here so that a
+    # failed login is not cached and gets retried by the next poll
+    if not lemmy.log_in(username, password):
+        raise RuntimeError(f"Failed to log into {instance_url} as {username}")
+
+    # A community's id never changes, so only look it up the first time
+    community_ids = load_community_ids()
+    community_key = f"{instance_url}/c/{community_name}"
+    community_id = community_ids.get(community_key)
+
+    if community_id is None:
+        community_id = lemmy.discover_community(community_name)
+        if community_id is None:
+            raise RuntimeError(f"Failed to find the community {community_name} on {instance_url}")
+        community_ids[community_key] = community_id
+        save_community_ids(community_ids)
+
+    return lemmy, community_id
+
+class TokenBucket:
+    """
+    Rate limiter allowing `rate` acquisitions per second on average, with bursts of up to
+    `capacity`. Waiting only happens when the bucket is empty, instead of after every call.
+    """
 
-def remove_old_entries(entries, limit_hours=24):
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+async def publish_entry(entry, lemmy, community_id, seen_ids):
+    # Publish the summary to lemmy
+    path = urlparse(entry.link).path
+    formatted, extracted_url = format_and_extract(entry.summary)
+
+    print(f"Publishing post: {path}")
+    result = await asyncio.to_thread(
+        lemmy.post.create,
+        community_id=community_id,
+        name=fast_unescape(entry.title),
+        url=extracted_url,
+        body=formatted,
+    )
+
+    # pythorhead logs failed requests (HTTP errors, rate limiting, timeouts) and returns None
+    # instead of raising, the entry must not be marked as seen in that case
+    if result is None:
+        raise RuntimeError(f"Failed to publish post: {path}")
+
+    # Now, remember it right away so that it is never published twice, even if the script is killed
+    mark_seen(seen_ids, entry.id)
+    save_seen_ids(seen_ids)
+
+async def publish_entries(entries, lemmy, community_id, seen_ids, rate_limiter, max_workers):
     """
-    Remove entries that are older than `limit_hours` hours
+    Publish the entries with a small pool of workers fed by a bounded queue, each post waiting
+    for a token from `rate_limiter`. Returns the exceptions of the posts that failed.
     """
+    queue = asyncio.Queue(maxsize=max_workers)
+    errors = []
+
+    async def worker():
+        while (entry := await queue.get()) is not None:
+            try:
+                await rate_limiter.acquire()
+                await publish_entry(entry, lemmy, community_id, seen_ids)
+            except Exception as e:
+                # Keep going, the other entries can still be published. Only the first error is
+                # re-raised by poll, so report each one here.
+                print(f"Error while publishing {urlparse(entry.link).path}: {e!r}")
+                errors.append(e)
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(max_workers, len(entries)))]
+    for entry in entries:
+        await queue.put(entry)
+    for _ in workers:
+        await queue.put(None)
+    await asyncio.gather(*workers)
+
+    return errors
+
+async def poll(
+    session,
+    connect,
+    subreddit_rss_url,
+    feed_cache,
+    seen_ids,
+    ignored_domains,
+    limit_hours,
+    rate_limiter,
+    max_concurrent_posts,
+):
+    """
+    Fetch the feed once and publish its new entries. `feed_cache` and `seen_ids` are updated
+    in place so that the next poll can reuse them.
+    """
+    # Conditional GET: Reddit answers 304 with no body if the feed did not change since the last poll
+    fetched = await asyncio.to_thread(
+        fetch_feed,
+        session,
+        subreddit_rss_url,
+        etag=feed_cache.get("etag"),
+        modified=feed_cache.get("modified"),
+    )
+    dt_now = dt.datetime.now(dt.timezone.utc)
 
-    new_entries = []
+    if fetched is None:
+        print("Feed was not modified since the last poll, nothing to publish")
+        return dt_now
 
-    dt_now = dt.datetime.now(dt.timezone.utc)
+    # The feed is downloaded once and its content parsed once, here
+    content, etag, modified = fetched
+    entries = parse_feed(content)
+    print("Total number of feed entries:", len(entries))
 
+    now_epoch = time.time()
+    entries_to_publish = []
     for entry in entries:
-        entry_published = dt.datetime.fromisoformat(entry.published)
-        time_diff = dt_now - entry_published
+        if entry.id in seen_ids:
+            # Already published or skipped, even if Reddit reordered the feed or the script restarted
+            seen_ids.move_to_end(entry.id)
+            continue
 
-        if time_diff < dt.timedelta(hours=limit_hours):
-            new_entries.append(entry)
+        path = urlparse(entry.link).path
 
-    return new_entries
+        if "General Discussion - Daily Thread" in entry.title:
+            print(f"Skip Reddit Discussion Thread: {path}")
+            mark_seen(seen_ids, entry.id)
+        elif now_epoch - entry.published > limit_hours * 3600:
+            # Only matters when there is no history yet, e.g. the first run or a lost artifact
+            print(f"Skip entry published >{limit_hours}h ago: {path}")
+            mark_seen(seen_ids, entry.id)
+        elif (base_domain := find_base_domain(extract_shared_url(entry.summary))) in ignored_domains:
+            print(
+                f"Ignore post with link matched to '{base_domain}' in ignore list: {path}"
+            )
+            mark_seen(seen_ids, entry.id)
+        else:
+            entries_to_publish.append(entry)
 
-def main():
+    print("\nNumber of entries to be published to lemmy:", len(entries_to_publish))
+
+    if entries_to_publish:
+        # Only log in once there is something to publish, the client is then reused by later polls
+        lemmy, community_id = await connect()
+
+        # Post concurrently, but never more than `max_concurrent_posts` at once and within the
+        # rate limit, to stay polite with the instance
+        errors = await publish_entries(
+            entries_to_publish,
+            lemmy,
+            community_id,
+            seen_ids,
+            rate_limiter,
+            max_concurrent_posts,
+        )
+
+        if errors:
+            raise errors[0]
+
+    # Also persist the skipped entries, so that they are not reconsidered after a restart
+    save_seen_ids(seen_ids)
+
+    # Only remember the feed's validators once all of its entries were handled, otherwise
+    # a 304 on the next poll would prevent retrying the entries that failed
+    feed_cache.update(etag=etag, modified=modified)
+    save_feed_cache(etag, modified)
+
+    return dt_now
+
+async def main(poll_interval=None):
+    """
+    Poll the subreddit feed and publish new entries to lemmy. By default, the feed is polled
+    once (which is how the GitHub workflow runs it). If `poll_interval` is given, keep polling
+    every `poll_interval` seconds, reusing the lemmy login and the state of previous polls.
+    """
     limit_hours = 24
     instance_url = "https://lemmy.ca"
     community_name = 'bapcsalescanada'
     subreddit_rss_url = "https://www.reddit.com/r/bapcsalescanada/new/.rss"
-    sleep_time = 5
+    posts_per_minute = 12
+    max_concurrent_posts = 3
 
     username = os.environ["LEMMY_USERNAME"]
     password = os.environ["LEMMY_PASSWORD"]
@@ -147,68 +547,72 @@ def main():
     ignored_domains = load_ignored_domains()
 
     # Read the last published date from last_date_published.txt
-    lemmy = Lemmy(instance_url)
-    lemmy.log_in(username, password)
-
     last_published = get_last_published_time()
     print("Fetched last published date:", last_published)
 
-    community_id = lemmy.discover_community(community_name)
-    feed = feedparser.parse(subreddit_rss_url)
-
-    print("Total number of feed entries:", len(feed.entries))
-    dt_now = dt.datetime.now(dt.timezone.utc)
-    write_last_published_time(dt_now)
-    print("Written last published time as:", dt_now)
-    
-    published_urls_dict = load_published_urls_dict()
-    published_urls_dict = remove_old_url_keys(published_urls_dict, limit_hours=limit_hours)
-    print(f"Found {len(published_urls_dict)} URLs from reddit that was published to lemmy in the last {limit_hours} hours")
-
-    entries_to_publish = []
-    for entry in feed.entries:
-        entry_published = dt.datetime.fromisoformat(entry.published)
-        time_diff = dt_now - entry_published
-        path = urlparse(entry.link).path
+    feed_cache = load_feed_cache()
+    seen_ids = load_seen_ids()
+    print(f"Found {len(seen_ids)} reddit entries that were already handled")
 
-        if "General Discussion - Daily Thread" in entry.title:
-            print(f"Skip Reddit Discussion Thread: {path}")
-        
-        elif time_diff > dt.timedelta(hours=limit_hours):
-            print(f"Skip entry published >{limit_hours}h ago: {path}")
-        elif entry.link in published_urls_dict:
-            print(f"Skip entry already published:  {path}")
-        else:
-            entries_to_publish.append(entry)
+    # Shared by every poll, so that the rate limit also holds across polls
+    rate_limiter = TokenBucket(rate=posts_per_minute / 60, capacity=max_concurrent_posts)
 
-    print("\nNumber of entries to be published to lemmy:", len(entries_to_publish))
+    # The Reddit connection is kept alive for the whole run
+    session = make_session()
 
-    for entry in entries_to_publish:
-        # Publish the summary to lemmy and sleep for a bit
-        path = urlparse(entry.link).path
-        formatted, extracted_url = format_and_extract(entry.summary)
-        base_domain = find_base_domain(extracted_url)
+    # Logging into lemmy is deferred until the first poll that has something to publish, and
+    # retried by the next poll if it failed
+    lemmy_task = None
 
-        if base_domain in ignored_domains:
-            print(
-                f"Ignore post with link matched to '{base_domain}' in ignore list: {path}"
+    def connect():
+        nonlocal lemmy_task
+        if lemmy_task is None or (lemmy_task.done() and lemmy_task.exception() is not None):
+            lemmy_task = asyncio.create_task(
+                asyncio.to_thread(
+                    connect_lemmy, instance_url, username, password, community_name
+                )
             )
-                
-        else:
-            print(f"Publishing post: {path}")
-            lemmy.post.create(
-                community_id=community_id,
-                name=html.unescape(entry.title),
-                url=extracted_url,
-                body=formatted,
+        return lemmy_task
+
+    # Handled entries are saved as soon as each post succeeds, the last poll time is only
+    # persisted once, when the script exits (including on errors)
+    last_polled = None
+
+    def save_last_polled():
+        if last_polled is not None:
+            write_last_published_time(last_polled)
+
+    atexit.register(save_last_polled)
+
+    while True:
+        started = time.monotonic()
+        try:
+            last_polled = await poll(
+                session,
+                connect,
+                subreddit_rss_url,
+                feed_cache,
+                seen_ids,
+                ignored_domains,
+                limit_hours,
+                rate_limiter,
+                max_concurrent_posts,
             )
-            time.sleep(sleep_time)
+        except Exception:
+            if poll_interval is None:
+                raise
+            traceback.print_exc()
 
-            # Now, add this to list of published files
-            published_urls_dict[entry.link] = {"published_time": entry.published}
+        if poll_interval is None:
+            break
+        await asyncio.sleep(max(0, poll_interval - (time.monotonic() - started)))
 
+if __name__ == "__main__":
+    import argparse
 
-    save_published_urls_dict(published_urls_dict)
+    parser = argparse.ArgumentParser(description='Repost new entries of a subreddit to a lemmy community.')
+    parser.add_argument('--poll_interval', type=float, help='Keep polling the feed every this many seconds, instead of polling it once')
 
-if __name__ == "__main__":
-    main()
+    args = parser.parse_args()
+
+    asyncio.run(main(poll_interval=args.poll_interval))